@@ -1,9 +1,10 @@
-from flask import Flask, jsonify
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from flask import Flask, Response, stream_with_context
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import scoped_session, sessionmaker
+import json
 import os
 from models import Base, StockSymbol
-import sqlalchemy.dialects.postgresql  
+import sqlalchemy.dialects.postgresql
 
 app = Flask(__name__)
 
@@ -13,19 +14,39 @@ if not DATABASE_URL:
 
 
 if DATABASE_URL.startswith("postgres://"):
-    DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql+psycopg2://")
+    DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql+psycopg2://", 1)
 
 print(f"database url: {DATABASE_URL}")
-engine = create_engine(DATABASE_URL)
-Session = sessionmaker(bind=engine)
-session = Session()
+engine = create_engine(
+    DATABASE_URL,
+    pool_size=10,
+    max_overflow=20,
+    pool_pre_ping=True,
+    pool_recycle=1800,
+)
+# One session per thread/request, all drawing from the same warm pool
+session = scoped_session(sessionmaker(bind=engine))
 
 Base.metadata.create_all(engine)
 
+@app.teardown_appcontext
+def remove_session(exception=None):
+    session.remove()
+
 @app.route('/stocks', methods=['GET'])
 def get_stocks():
-    stocks = session.query(StockSymbol).all()
-    return jsonify([{"symbol": stock.symbol, "name": stock.name, "exchange": stock.exchange} for stock in stocks])
+    # Stream rows off a server-side cursor instead of building the whole list in memory
+    stmt = select(StockSymbol.symbol, StockSymbol.name, StockSymbol.exchange).execution_options(yield_per=500)
+
+    def generate():
+        yield "["
+        separator = ""
+        for symbol, name, exchange in session.execute(stmt):
+            yield separator + json.dumps({"symbol": symbol, "name": name, "exchange": exchange})
+            separator = ","
+        yield "]"
+
+    return Response(stream_with_context(generate()), mimetype="application/json")
 
 if __name__ == "__main__":
     app.run(debug=True)
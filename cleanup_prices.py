@@ -0,0 +1,41 @@
+from sqlalchemy import create_engine, delete, select
+from sqlalchemy.orm import sessionmaker
+import os
+from datetime import datetime, timezone, timedelta
+from models import StockPrice
+
+DATABASE_URL = os.environ.get('DATABASE_URL')
+if not DATABASE_URL:
+    raise ValueError("No DATABASE_URL environment variable set")
+
+engine = create_engine(
+    DATABASE_URL,
+    connect_args={"options": "-c statement_timeout=30000"},  # 30 second timeout
+    pool_pre_ping=True,
+)
+Session = sessionmaker(bind=engine)
+session = Session()
+
+RETENTION_HOURS = 24
+CLEANUP_BATCH_SIZE = 10000
+
+def delete_old_prices():
+    cutoff_time = datetime.now(timezone.utc) - timedelta(hours=RETENTION_HOURS)
+    # Delete in bounded chunks so each transaction holds its row locks only briefly
+    expired_ids = select(StockPrice.id).where(StockPrice.timestamp < cutoff_time).limit(CLEANUP_BATCH_SIZE)
+    stmt = delete(StockPrice).where(StockPrice.id.in_(expired_ids))
+    total_deleted = 0
+    try:
+        while True:
+            deleted = session.execute(stmt, execution_options={"synchronize_session": False}).rowcount
+            session.commit()
+            total_deleted += deleted
+            if deleted < CLEANUP_BATCH_SIZE:
+                break
+    except Exception as e:
+        session.rollback()
+        print(f"Error deleting old records: {e}")
+    print(f"Deleted {total_deleted} price records older than {RETENTION_HOURS}h")
+
+if __name__ == "__main__":
+    delete_old_prices()
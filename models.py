@@ -1,5 +1,5 @@
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy import Column, Integer, String, UniqueConstraint
+from sqlalchemy import Column, Integer, String, Float, DateTime, Index, UniqueConstraint, func
 
 Base = declarative_base()
 
@@ -10,3 +10,17 @@ class StockSymbol(Base):
     name = Column(String, nullable=True)
     exchange = Column(String, nullable=False)
     __table_args__ = (UniqueConstraint("symbol", "exchange", name="_symbol_exchange_uc"),)
+
+class StockPrice(Base):
+    __tablename__ = 'stock_prices'
+    id = Column(Integer, primary_key=True)
+    symbol = Column(String, nullable=False)
+    name = Column(String, nullable=True)
+    price = Column(Float, nullable=False)
+    timestamp = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    __table_args__ = (
+        # Serves the per-symbol "latest price" / lookback scans done by the alert checker
+        Index("ix_stock_prices_symbol_ts", "symbol", timestamp.desc()),
+        # Lets the 24h cleanup DELETE range-scan instead of walking the whole table
+        Index("ix_stock_prices_timestamp", "timestamp"),
+    )
@@ -1,84 +1,134 @@
 import yfinance as yf
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime
-from sqlalchemy.orm import declarative_base, sessionmaker
+import pandas as pd
+from sqlalchemy import create_engine, insert, inspect, select, text
+from sqlalchemy.orm import sessionmaker
 import os
-from datetime import datetime, timezone, timedelta
-from models import StockSymbol
+import io
+import csv
+from models import Base, StockSymbol, StockPrice
 import time
 
-Base = declarative_base()
-
-class StockPrice(Base):
-    __tablename__ = 'stock_prices'
-    id = Column(Integer, primary_key=True)
-    symbol = Column(String, nullable=False)
-    name = Column(String, nullable=True)
-    price = Column(Float, nullable=False)
-    timestamp = Column(DateTime, default=lambda: datetime.now(timezone.utc))
-
 DATABASE_URL = os.environ.get('DATABASE_URL')
 if not DATABASE_URL:
     raise ValueError("No DATABASE_URL environment variable set")
 
-engine = create_engine(DATABASE_URL, connect_args={"options": "-c statement_timeout=30000"})  # 30 second timeout
+engine = create_engine(
+    DATABASE_URL,
+    connect_args={
+        "options": "-c statement_timeout=30000",  # 30 second timeout
+        "keepalives": 1,
+        "keepalives_idle": 30,
+    },
+    pool_pre_ping=True,
+    pool_recycle=1800,
+    executemany_mode="values_plus_batch",
+    insertmanyvalues_page_size=1000,
+)
 Session = sessionmaker(bind=engine)
 session = Session()
 
 Base.metadata.create_all(engine)
+# create_all skips tables that already exist, so add any missing indexes explicitly
+for index in StockPrice.__table__.indexes:
+    index.create(engine, checkfirst=True)
+# Same for the server-side timestamp default on tables created before it existed
+price_columns = {column["name"]: column for column in inspect(engine).get_columns("stock_prices")}
+if not price_columns["timestamp"]["default"]:
+    with engine.begin() as conn:
+        conn.execute(text('ALTER TABLE stock_prices ALTER COLUMN "timestamp" SET DEFAULT now()'))
 
 YAHOO_URL = "https://finance.yahoo.com/quote"
+BATCH_SIZE = 200
+
+def fetch_batch(symbols):
+    # One multi-symbol request per batch instead of one .info round trip per ticker;
+    # a few days of daily bars so the last close is still there outside market hours
+    data = yf.download(symbols, period="5d", interval="1d", group_by="ticker",
+                       threads=True, progress=False, auto_adjust=False)
+    if data.empty:
+        return {}
+    if isinstance(data.columns, pd.MultiIndex):
+        closes = data.xs("Close", axis=1, level=1)
+    else:
+        closes = data[["Close"]].set_axis(symbols, axis=1)
+    # Last non-null close for every symbol in one frame operation, not a lookup per cell
+    return closes.ffill().iloc[-1].dropna().astype(float).to_dict()
 
 def fetch_stock_prices():
     print("Trying to fetch stock prices")
-    stock_symbols = session.query(StockSymbol).all()
-    if not stock_symbols:
+    # Only two columns are needed, so stream plain tuples instead of loading ORM objects
+    stmt = select(StockSymbol.symbol, StockSymbol.name).execution_options(yield_per=1000)
+    symbol_names = {symbol: name for symbol, name in session.execute(stmt)}
+    # Release the connection before the downloads instead of idling in a transaction
+    session.close()
+    if not symbol_names:
         print("No stock symbols found in the database.")
         return []
+    symbols = list(symbol_names)
     stock_data = []
-    for stock_symbol in stock_symbols:
-        symbol = stock_symbol.symbol
-        name = stock_symbol.name
+    for i in range(0, len(symbols), BATCH_SIZE):
+        batch = symbols[i:i + BATCH_SIZE]
         try:
-            print(symbol)
-            stock = yf.Ticker(symbol)
-            print(stock)
-            price_data = stock.info.get("currentPrice")
+            prices = fetch_batch(batch)
+        except Exception as e:
+            print(f"Error fetching batch starting at symbol: {batch[0]}, Error: {e}")
+            continue
+        for symbol in batch:
+            price_data = prices.get(symbol)
             if price_data is not None:
                 stock_data.append({
                     "symbol": symbol,
-                    "name": name,
+                    "name": symbol_names[symbol],
                     "price": price_data
                 })
             else:
                 print(f"No price data for symbol: {symbol}")
-        except Exception as e:
-            print(f"Error fetching data for symbol: {symbol}, Error: {e}")
+    print(f"Fetched prices for {len(stock_data)} of {len(symbols)} symbols")
     return stock_data
 
-def save_stock_prices(stock_data, batch_size=20):
-    for i in range(0, len(stock_data), batch_size):
-        batch = stock_data[i:i + batch_size]
+def copy_stock_prices(stock_data):
+    # Stream all rows through a single COPY instead of parsing one INSERT per row;
+    # timestamp is left to the column's server default
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for entry in stock_data:
+        writer.writerow((entry["symbol"], entry["name"], entry["price"]))
+    buf.seek(0)
+    conn = engine.raw_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.copy_expert('COPY stock_prices (symbol, name, price) FROM STDIN WITH (FORMAT csv)', buf)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+def insert_stock_prices(stock_data):
+    # One executemany of plain dicts; the driver pages rows into multi-VALUES INSERTs
+    try:
+        session.execute(insert(StockPrice), stock_data)
+        session.commit()
+    except Exception as e:
+        session.rollback()
+        print(f"Error saving prices: {e}")
+        time.sleep(5)
         try:
-            session.bulk_save_objects([StockPrice(**entry) for entry in batch])
+            session.execute(insert(StockPrice), stock_data)
             session.commit()
         except Exception as e:
             session.rollback()
-            print(f"Error saving batch: {e}")
-            time.sleep(5)  
-            try:
-                session.bulk_save_objects([StockPrice(**entry) for entry in batch])
-                session.commit()
-            except Exception as e:
-                session.rollback()
-                print(f"Error saving batch after retry: {e}")
+            print(f"Error saving prices after retry: {e}")
 
-    cutoff_time = datetime.now(timezone.utc) - timedelta(hours=24)
+def save_stock_prices(stock_data):
+    if not stock_data:
+        return
     try:
-        session.query(StockPrice).filter(StockPrice.timestamp < cutoff_time).delete(synchronize_session=False)
-        session.commit()
+        copy_stock_prices(stock_data)
     except Exception as e:
-        session.rollback()
-        print(f"Error deleting old records: {e}")
+        print(f"Error copying prices, falling back to INSERT: {e}")
+        insert_stock_prices(stock_data)
 
 if __name__ == "__main__":
     stock_data = fetch_stock_prices()
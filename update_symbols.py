@@ -1,23 +1,23 @@
 from pyfinviz.screener import Screener
 import pandas as pd
 import os
-from sqlalchemy import create_engine, Column, String
-from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy import create_engine
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import sessionmaker
-
-Base = declarative_base()
-
-class StockSymbol(Base):
-    __tablename__ = 'stock_symbols'
-    symbol = Column(String, primary_key=True)
-    name = Column(String)
-    exchange = Column(String)
+from models import Base, StockSymbol
 
 DATABASE_URL = os.environ.get('DATABASE_URL')
 if not DATABASE_URL:
     raise ValueError("No DATABASE_URL environment variable set")
 
-engine = create_engine(DATABASE_URL)
+engine = create_engine(
+    DATABASE_URL,
+    connect_args={"keepalives": 1, "keepalives_idle": 30},
+    pool_pre_ping=True,
+    pool_recycle=1800,
+    executemany_mode="values_plus_batch",
+    insertmanyvalues_page_size=1000,
+)
 Session = sessionmaker(bind=engine)
 session = Session()
 
@@ -26,19 +26,23 @@ Base.metadata.create_all(engine)
 def fetch_tickers_from_finviz(pages_to_fetch=10):
     screener = Screener(pages=[x for x in range(1, pages_to_fetch + 1)])
     data = screener.data_frames
-    all_data = [page for page in data.values()]
-    tickers_df = pd.concat(all_data, ignore_index=True)
-    return tickers_df[['Ticker', 'Company']]
+    # Keep only the two columns we store so concat doesn't copy every screener column
+    all_data = [page[['Ticker', 'Company']] for page in data.values()]
+    return pd.concat(all_data, ignore_index=True)
 
 # Save tickers to the database
 def save_symbols_to_db(tickers_df, exchange):
-    for index, row in tickers_df.iterrows():
-        symbol = row['Ticker']
-        name = row['Company']
-        existing_symbol = session.query(StockSymbol).filter_by(symbol=symbol, exchange=exchange).first()
-        if not existing_symbol:
-            new_symbol = StockSymbol(symbol=symbol, name=name, exchange=exchange)
-            session.add(new_symbol)
+    symbols_df = tickers_df.rename(columns={'Ticker': 'symbol', 'Company': 'name'}).assign(exchange=exchange)
+    # Screener pages can repeat a ticker; send each symbol once
+    symbols_df = symbols_df[['symbol', 'name', 'exchange']].dropna(subset=['symbol']).drop_duplicates('symbol')
+    # Missing company names go in as NULL rather than NaN
+    rows = symbols_df.astype(object).where(symbols_df.notna(), None).to_dict('records')
+    if not rows:
+        return
+    # Let the (symbol, exchange) unique constraint skip known symbols in one
+    # statement instead of a SELECT per ticker
+    stmt = pg_insert(StockSymbol).on_conflict_do_nothing(index_elements=['symbol', 'exchange'])
+    session.execute(stmt, rows)
     session.commit()
 
 def update_symbols():